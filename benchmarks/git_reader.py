@@ -0,0 +1,142 @@
+"""
+Benchmark reading `models.py@<ref>` the way `create`/`alter` do: pydal2sql-core's GitPython path vs. read_sources.
+
+Usage:
+    python benchmarks/git_reader.py --commits 50000 --refs 200
+
+This creates a repository with `--commits` commits (models.py changes every `--every` commits, another file in the
+others) using `git fast-import`, repacks it so all objects are packed and then reads models.py at `--refs` commits:
+- pydal2sql-core: `get_file_for_version` per ref, as in core_create/core_alter.
+- read_sources, one run per ref: a new GitReader for every ref, like separate `create models.py@<ref>` runs.
+- read_sources, all refs in one call: like the refs of one `alter` or the history for `squash`.
+"""
+
+import random
+import subprocess  # nosec: B404
+import sys
+import tempfile
+import time
+import typing
+from pathlib import Path
+from typing import Annotated, Optional
+
+import typer
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from pydal2sql_core.cli_support import get_file_for_version  # noqa: E402
+
+from pydal2sql.cli_support import read_sources  # noqa: E402
+from pydal2sql.git_reader import git_reader  # noqa: E402
+
+app = typer.Typer()
+
+
+def _data(text: str) -> bytes:
+    encoded = text.encode()
+    return b"data %d\n%s\n" % (len(encoded), encoded)
+
+
+def fast_import_stream(commits: int, every: int) -> typing.Generator[bytes, None, None]:
+    """
+    Yield a `git fast-import` stream with `commits` commits.
+    """
+    models = ['from pydal import Field\n\ndb.define_table("table_0", Field("field_0"))\n']
+    for n in range(1, commits + 1):
+        yield b"commit refs/heads/master\nmark :%d\n" % n
+        yield b"committer Benchmark <benchmark@example.com> %d +0000\n" % (1_700_000_000 + n)
+        yield _data(f"commit {n}")
+        if n > 1:
+            yield b"from :%d\n" % (n - 1)
+
+        if n == 1 or n % every == 0:
+            models.append(f'db.define_table("table_{n}", Field("field_{n}"))\n')
+            yield b"M 100644 inline models.py\n" + _data("".join(models))
+        else:
+            yield b"M 100644 inline noise.txt\n" + _data(str(n))
+
+
+def create_repository(path: Path, commits: int, every: int) -> list[str]:
+    """
+    Create the benchmark repository and return all commit shas.
+    """
+    subprocess.run(["git", "init", "-q", str(path)], check=True)  # nosec: B603 B607
+    importer = subprocess.Popen(  # nosec: B603 B607
+        ["git", "fast-import", "--quiet"],
+        cwd=path,
+        stdin=subprocess.PIPE,
+    )
+    stdin = typing.cast(typing.IO[bytes], importer.stdin)
+    for chunk in fast_import_stream(commits, every):
+        stdin.write(chunk)
+    stdin.close()
+    importer.wait()
+
+    subprocess.run(["git", "checkout", "-q", "master"], cwd=path, check=True)  # nosec: B603 B607
+    subprocess.run(["git", "repack", "-a", "-d", "-q"], cwd=path, check=True)  # nosec: B603 B607
+
+    return subprocess.run(  # nosec: B603 B607
+        ["git", "rev-list", "HEAD"], cwd=path, check=True, capture_output=True, text=True
+    ).stdout.split()
+
+
+def timed(description: str, func: typing.Callable[[], list[str]]) -> list[str]:
+    """
+    Run and time func.
+    """
+    start = time.perf_counter()
+    result = func()
+    print(f"{description}: {time.perf_counter() - start:.3f}s")
+    return result
+
+
+@app.command()
+def main(
+    commits: int = 50_000,
+    refs: int = 200,
+    every: int = 100,
+    repository: Annotated[Optional[Path], typer.Option(help="Reuse (or keep) the repository at this path.")] = None,
+) -> None:
+    """
+    Run the benchmark.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = (repository or Path(tmp) / "repo").resolve()
+        if (path / ".git").exists():
+            all_commits = subprocess.run(  # nosec: B603 B607
+                ["git", "rev-list", "HEAD"], cwd=path, check=True, capture_output=True, text=True
+            ).stdout.split()
+        else:
+            all_commits = timed(
+                f"create repository ({commits} commits)", lambda: create_repository(path, commits, every)
+            )
+
+        sample = random.Random(0).sample(all_commits, min(refs, len(all_commits)))  # nosec: B311
+        models = str(path / "models.py")
+
+        expected = timed(
+            f"pydal2sql-core, {len(sample)} refs", lambda: [get_file_for_version(models, sha) for sha in sample]
+        )
+
+        def one_run(sha: str) -> str:
+            # a fresh process, as in a separate pydal2sql run:
+            git_reader.cache_clear()
+            (code,) = read_sources([(sha, models)], path, ["table definition"])
+            git_reader(path).close()
+            return code
+
+        per_run = timed(f"read_sources, one run per ref, {len(sample)} refs", lambda: [one_run(sha) for sha in sample])
+
+        git_reader.cache_clear()
+        descriptions = ["table definition"] * len(sample)
+        actual = timed(
+            f"read_sources, one call, {len(sample)} refs",
+            lambda: read_sources([(sha, models) for sha in sample], path, descriptions),
+        )
+        git_reader(path).close()
+
+        assert actual == per_run == expected, "read_sources returned different contents!"
+
+
+if __name__ == "__main__":
+    app()
@@ -8,11 +8,11 @@ from typing import Optional
 
 import typer
 from configuraptor import Singleton
-from pydal2sql_core.cli_support import core_alter, core_create, core_stub
 from rich import print  # noqa: A004
 from typing_extensions import Never
 
 from .__about__ import __version__
+from .cli_support import run_alter, run_create, run_squash, run_stub
 from .typer_support import (
     DEFAULT_VERBOSITY,
     IS_DEBUG,
@@ -20,7 +20,13 @@ from .typer_support import (
     state,
     with_exit_code,
 )
-from .types import DBType_Option, OptionalArgument, OutputFormat_Option, Tables_Option
+from .types import (
+    DBType_Option,
+    OptionalArgument,
+    OutputFormat_Option,
+    Tables_Option,
+    Transaction_Option,
+)
 
 app = typer.Typer(
     no_args_is_help=True,
@@ -60,6 +66,7 @@ def create(
     function: Optional[str] = None,
     output_format: OutputFormat_Option = None,
     output_file: Optional[str] = None,
+    transaction: Transaction_Option = False,
 ) -> bool:
     """
     Build the CREATE statements for one or more pydal/typedal tables.
@@ -85,7 +92,7 @@ def create(
         output=output_file,
     )
 
-    if core_create(
+    if run_create(
         filename=config.input,
         db_type=config.db_type,
         tables=config.tables,
@@ -95,6 +102,7 @@ def create(
         function=config.function,
         output_format=config.format,
         output_file=config.output,
+        transaction=transaction,
     ):
         print("[green] success! [/green]", file=sys.stderr)
         return True
@@ -116,6 +124,7 @@ def alter(
     function: Optional[str] = None,
     output_format: OutputFormat_Option = None,
     output_file: Optional[str] = None,
+    transaction: Transaction_Option = False,
 ) -> bool:
     """
     Create the migration statements from one state to the other, by writing CREATE, ALTER and DROP statements.
@@ -143,7 +152,7 @@ def alter(
         output=output_file,
     ).update(dialect=dialect, _allow_none=True)
 
-    if core_alter(
+    if run_alter(
         config.input,
         filename_after or config.input,
         db_type=config.db_type,
@@ -154,6 +163,7 @@ def alter(
         function=config.function,
         output_format=config.format,
         output_file=config.output,
+        transaction=transaction,
     ):
         print("[green] success! [/green]", file=sys.stderr)
         return True
@@ -162,6 +172,81 @@ def alter(
         return False
 
 
+@app.command()
+@with_exit_code(hide_tb=not IS_DEBUG)
+def squash(
+    filename: OptionalArgument[str] = None,
+    since: typing.Annotated[
+        Optional[str],
+        typer.Option(help="Only verify against the model file's git history from this commit (output is unchanged)."),
+    ] = None,
+    migrations: typing.Annotated[
+        Optional[str],
+        typer.Option(
+            help="Verify against the migrations in this edwh-migrate file instead of the git history. "
+            "The output still comes from the model file."
+        ),
+    ] = None,
+    verify: typing.Annotated[
+        bool, typer.Option(help="Compare the history and the squashed migration on in-memory SQLite.")
+    ] = True,
+    db_type: DBType_Option = None,
+    dialect: DBType_Option = None,
+    tables: Tables_Option = None,
+    magic: Optional[bool] = None,
+    function: Optional[str] = None,
+    output_format: OutputFormat_Option = None,
+    output_file: Optional[str] = None,
+    transaction: Transaction_Option = False,
+) -> bool:
+    """
+    Collapse a history of migrations into the minimal CREATE statements for a fresh database.
+
+    The output is always the CREATE statements for the given version of the model file;
+    --since and --migrations only change the history it is verified against.
+
+    Examples:
+        > pydal2sql squash models.py
+        CREATE statements for models.py on disk, verified against its whole git history.
+
+        > pydal2sql squash models.py@latest --since b3f24091a9201d6 --output-file bootstrap.sql
+        CREATE statements for the latest commit, verified against the history since commit b3f...
+
+        > pydal2sql squash models.py --migrations migrations.py
+        CREATE statements for models.py, verified against the migrations in an edwh-migrate file.
+    """
+    dialect = db_type.value if db_type else dialect.value if dialect else None
+
+    config = state.update_config(
+        magic=magic,
+        tables=tables,
+        function=function,
+        format=output_format,
+        input=filename,
+        output=output_file,
+    ).update(dialect=dialect, _allow_none=True)
+
+    if run_squash(
+        config.input,
+        since=since,
+        migrations=migrations,
+        verify=verify,
+        db_type=config.db_type,
+        tables=config.tables,
+        verbose=state.verbosity > Verbosity.normal,
+        magic=config.magic,
+        function=config.function,
+        output_format=config.format,
+        output_file=config.output,
+        transaction=transaction,
+    ):
+        print("[green] success! [/green]", file=sys.stderr)
+        return True
+    else:
+        print("[red] squash failed! [/red]", file=sys.stderr)
+        return False
+
+
 @app.command()
 @with_exit_code(hide_tb=not IS_DEBUG)
 def stub(
@@ -177,7 +262,7 @@ def stub(
     Returns:
         bool: True if the stub migration is generated successfully, False otherwise.
 
-    This command updates the configuration with the provided options and calls the core_stub function to generate the
+    This command updates the configuration with the provided options and calls the run_stub function to generate the
     migration.
     """
     config = state.update_config(
@@ -185,7 +270,7 @@ def stub(
         output=output_file,
     )
 
-    return core_stub(
+    return run_stub(
         migration_name,  # raw, without date or number
         output_format=config.format,
         output_file=config.output,
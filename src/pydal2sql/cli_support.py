@@ -0,0 +1,490 @@
+"""
+CLI-specific glue between the Typer commands and pydal2sql-core.
+"""
+
+import functools
+import io
+import sqlite3
+import sys
+import typing
+from pathlib import Path
+from typing import Optional
+
+import rich
+from pydal2sql_core.cli_support import (
+    core_stub,
+    default_sql_renderer,
+    extract_file_version_and_path,
+    extract_file_versions_and_paths,
+    find_git_repo,
+    find_git_root,
+    get_absolute_path_info,
+    get_file_for_version,
+    render_schema_from_code,
+    try_format_and_write_sql_output,
+)
+from pydal2sql_core.helpers import detect_typedal, flatten
+from pydal2sql_core.types import (
+    DEFAULT_OUTPUT_FORMAT,
+    SUPPORTED_DATABASE_TYPES_WITH_ALIASES,
+    SUPPORTED_OUTPUT_FORMATS,
+)
+
+from .edwh_migrate import write_edwh_migrations
+from .git_reader import git_reader
+from .slicing import slice_code
+from .squash import migrations_from_file, verify_squash
+from .transaction import transaction_renderer
+
+
+def write_sql_output(
+    file: io.StringIO,
+    output_file: Optional[str | Path],
+    output_format: Optional[SUPPORTED_OUTPUT_FORMATS] = DEFAULT_OUTPUT_FORMAT,
+    is_typedal: bool = False,
+    default_migration_name: Optional[str] = None,
+) -> bool:
+    """
+    Format and write generated migration code, see `pydal2sql_core.cli_support.try_format_and_write_sql_output`.
+
+    edwh-migrate output to a file is appended using a sidecar index (see `edwh_migrate.write_edwh_migrations`),
+    so the existing migrations file doesn't have to be read and parsed again.
+    """
+    if isinstance(output_file, str):
+        # `--output-file -` will print to stdout
+        output_file = None if output_file == "-" else Path(output_file)
+
+    if output_format == "edwh-migrate" and output_file:
+        return write_edwh_migrations(
+            file.getvalue(),
+            output_file,
+            is_typedal=is_typedal,
+            default_migration_name=default_migration_name,
+        )
+
+    return try_format_and_write_sql_output(
+        file,
+        output_file,
+        output_format=output_format or DEFAULT_OUTPUT_FORMAT,
+        is_typedal=is_typedal,
+        default_migration_name=default_migration_name,
+    )
+
+
+def render_sql(
+    code_before: str,
+    code_after: str,
+    db_type: Optional[str] = None,
+    tables: Optional[list[str]] = None,
+    verbose: bool = False,
+    noop: bool = False,
+    magic: bool = False,
+    function_name: Optional[str | tuple[str, ...]] = "define_tables",
+    transaction: bool = False,
+) -> Optional[io.StringIO]:
+    """
+    Execute the table definitions and render the raw SQL (tables separated by END OF MIGRATION).
+
+    With `transaction`, all statements are batched together (see `transaction.batch_sql`).
+
+    Returns:
+        The rendered SQL, or None if the code could not be executed.
+    """
+    raw_output = io.StringIO()
+    success = render_schema_from_code(
+        code_after,
+        code_before=code_before,
+        output_file=raw_output,
+        renderer=transaction_renderer(default_sql_renderer) if transaction else default_sql_renderer,
+        db_type=db_type,
+        tables=tables,
+        verbose=verbose,
+        noop=noop,
+        magic=magic,
+        function_name=function_name,
+        use_typedal=detect_typedal(code_before) or detect_typedal(code_after),
+        write_mode="w",
+    )
+    return raw_output if success else None
+
+
+def check_transaction_format(transaction: bool, output_format: Optional[SUPPORTED_OUTPUT_FORMATS]) -> None:
+    """
+    Refuse `--transaction` with `--format edwh-migrate`.
+
+    Raises:
+        ValueError: If `transaction` is combined with the edwh-migrate output format.
+    """
+    if transaction and output_format == "edwh-migrate":
+        # a COMMIT inside a migration would end the transaction edwh-migrate runs it in
+        raise ValueError(
+            "--transaction can not be used with --format edwh-migrate, which already runs every "
+            "migration in its own transaction."
+        )
+
+
+def handle_cli(
+    code_before: str,
+    code_after: str,
+    db_type: Optional[str] = None,
+    tables: Optional[list[str]] = None,
+    verbose: bool = False,
+    noop: bool = False,
+    magic: bool = False,
+    function_name: Optional[str | tuple[str, ...]] = "define_tables",
+    output_format: Optional[SUPPORTED_OUTPUT_FORMATS] = DEFAULT_OUTPUT_FORMAT,
+    output_file: Optional[str | Path] = None,
+    transaction: bool = False,
+) -> bool:
+    """
+    Execute the table definitions and write the SQL, see `pydal2sql_core.cli_support.handle_cli`.
+
+    With `transaction`, all statements are batched together (see `transaction.batch_sql`).
+
+    Raises:
+        ValueError: If `transaction` is combined with the edwh-migrate output format.
+    """
+    check_transaction_format(transaction, output_format)
+
+    raw_output = render_sql(
+        code_before,
+        code_after,
+        db_type=db_type,
+        tables=tables,
+        verbose=verbose,
+        noop=noop,
+        magic=magic,
+        function_name=function_name,
+        transaction=transaction,
+    )
+    if raw_output is None:
+        return False
+    if noop:
+        return True
+
+    is_typedal = detect_typedal(code_before) or detect_typedal(code_after)
+    return write_sql_output(raw_output, output_file, output_format=output_format, is_typedal=is_typedal)
+
+
+def resolve_source(filename: Optional[str], version: str, git_root: Optional[Path]) -> str:
+    """
+    Absolute path of a source file (./file or /file seen from the git root), see `get_absolute_path_info`.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    file_exists, file_absolute_path = get_absolute_path_info(filename, version, git_root)
+    if not file_exists or (version != "stdin" and not filename):
+        raise FileNotFoundError(f"Source file {filename} could not be found.")
+
+    return file_absolute_path
+
+
+def read_sources(
+    sources: typing.Sequence[tuple[str, str]],
+    git_root: Optional[Path],
+    descriptions: typing.Sequence[str],
+    with_git: bool = True,
+) -> list[str]:
+    """
+    Read (version, absolute path) sources, see `pydal2sql_core.cli_support.get_file_for_version`.
+
+    Git versions (a commit, branch, tag or 'latest') are all read in one call to the persistent GitReader of the
+    repository, instead of a GitPython lookup per version.
+
+    Raises:
+        FileNotFoundError: If a version of a file does not exist in git.
+    """
+    from_git = {
+        idx: (path, version)
+        for idx, (version, path) in enumerate(sources)
+        if with_git and git_root and version not in {"current", "stdin"}
+    }
+    git_contents = dict(zip(from_git, git_reader(git_root).read_files(from_git.values()))) if git_root else {}
+
+    contents = []
+    for idx, ((version, path), description) in enumerate(zip(sources, descriptions)):
+        if idx not in from_git:
+            contents.append(get_file_for_version(path, version, prompt_description=description, with_git=with_git))
+        elif (code := git_contents[idx]) is None:
+            raise FileNotFoundError(f"{path}@{version}")
+        else:
+            contents.append(code)
+
+    return contents
+
+
+def split_function(filename: Optional[str], functions: set[str]) -> Optional[str]:
+    """
+    Strip a `:<function>` suffix (e.g. models.py:define_tables) from filename and add it to `functions`.
+    """
+    if filename and ":" in filename:
+        filename, _function = filename.split(":", 1)
+        functions.add(_function)
+
+    return filename
+
+
+def run_create(
+    filename: Optional[str] = None,
+    tables: Optional[list[str]] = None,
+    db_type: Optional[SUPPORTED_DATABASE_TYPES_WITH_ALIASES] = None,
+    magic: bool = False,
+    noop: bool = False,
+    verbose: bool = False,
+    function: Optional[str] = None,
+    output_format: Optional[SUPPORTED_OUTPUT_FORMATS] = DEFAULT_OUTPUT_FORMAT,
+    output_file: Optional[str | Path] = None,
+    transaction: bool = False,
+) -> bool:
+    """
+    Generate the CREATE statements for `filename`, see `pydal2sql_core.cli_support.core_create`.
+
+    When `tables` are selected, the source code is sliced down to the statements required for those tables
+    before it is executed.
+    """
+    functions: set[str] = {function} if function else set()
+    filename = split_function(filename, functions)
+
+    version, file_path = extract_file_version_and_path(filename, default_version="current" if filename else "stdin")
+    git_root = find_git_root(file_path) or find_git_root()
+    (code,) = read_sources([(version, resolve_source(file_path, version, git_root))], git_root, ["table definition"])
+
+    return handle_cli(
+        "",
+        slice_code(code, flatten(tables or []), functions),
+        db_type=db_type,
+        tables=tables,
+        verbose=verbose,
+        noop=noop,
+        magic=magic,
+        function_name=tuple(functions),
+        output_format=output_format,
+        output_file=output_file,
+        transaction=transaction,
+    )
+
+
+def read_alter_sources(
+    filename_before: Optional[str],
+    filename_after: Optional[str],
+    functions: set[str],
+) -> tuple[str, str]:
+    """
+    Read the code before and after for `alter`, using the same file specs and checks as `core_alter`.
+
+    core_alter offers no way to transform the code before it is executed, so only its (public) building blocks
+    are used here. `:<function>` suffixes are added to `functions`.
+
+    Raises:
+        FileNotFoundError: If either of the files does not exist.
+        ValueError: If either of the files is empty or both contain the same code.
+    """
+    git_root = find_git_root(filename_before) or find_git_root(filename_after)
+    sources = extract_file_versions_and_paths(
+        split_function(filename_before, functions),
+        split_function(filename_after, functions),
+    )
+
+    # either ./file exists or /file exists (seen from git root):
+    if missing := [path for version, path in sources if not get_absolute_path_info(path, version, git_root)[0]]:
+        raise FileNotFoundError(" ".join(f"Path {path} does not exist!" for path in dict.fromkeys(missing)))
+
+    # both versions are resolved in one go:
+    code_before, code_after = read_sources(
+        [(version, get_absolute_path_info(path, version, git_root)[1]) for version, path in sources],
+        git_root,
+        ["current table definition", "desired table definition"],
+        with_git=git_root is not None,
+    )
+
+    if not (code_before and code_after):
+        message = ""
+        message += "" if code_before else "Before code is empty (Maybe try `pydal2sql create`)! "
+        message += "" if code_after else "After code is empty! "
+        raise ValueError(message)
+
+    if code_before == code_after:
+        raise ValueError("Both contain the same code - nothing to alter!")
+
+    return code_before, code_after
+
+
+def run_alter(
+    filename_before: Optional[str] = None,
+    filename_after: Optional[str] = None,
+    tables: Optional[list[str]] = None,
+    db_type: Optional[SUPPORTED_DATABASE_TYPES_WITH_ALIASES] = None,
+    magic: bool = False,
+    noop: bool = False,
+    verbose: bool = False,
+    function: Optional[str] = None,
+    output_format: Optional[SUPPORTED_OUTPUT_FORMATS] = DEFAULT_OUTPUT_FORMAT,
+    output_file: Optional[str | Path] = None,
+    transaction: bool = False,
+) -> bool:
+    """
+    Generate the migration from `filename_before` to `filename_after`, see `pydal2sql_core.cli_support.core_alter`.
+
+    When `tables` are selected, both versions of the source code are sliced down to the statements required
+    for those tables before they are executed.
+    """
+    functions: set[str] = {function} if function else set()
+    try:
+        code_before, code_after = read_alter_sources(filename_before, filename_after, functions)
+    except ValueError as e:
+        rich.print(f"[yellow] {e} [/yellow]", file=sys.stderr)
+        return False
+
+    selected = flatten(tables or [])
+    return handle_cli(
+        slice_code(code_before, selected, functions),
+        slice_code(code_after, selected, functions),
+        db_type=db_type,
+        tables=tables,
+        verbose=verbose,
+        noop=noop,
+        magic=magic,
+        function_name=tuple(functions),
+        output_format=output_format,
+        output_file=output_file,
+        transaction=transaction,
+    )
+
+
+def run_stub(
+    migration_name: str,
+    output_format: Optional[SUPPORTED_OUTPUT_FORMATS] = DEFAULT_OUTPUT_FORMAT,
+    output_file: Optional[str | Path] = None,
+    dry_run: bool = False,
+    is_typedal: bool = False,
+) -> bool:
+    """
+    Generate a dummy migration, see `pydal2sql_core.cli_support.core_stub`.
+
+    Only writing an edwh-migrate file is done here, to keep the sidecar index of that file up to date.
+    """
+    if dry_run or output_format != "edwh-migrate" or not output_file or output_file == "-":
+        return core_stub(
+            migration_name,
+            output_format=output_format,
+            output_file=output_file,
+            dry_run=dry_run,
+            is_typedal=is_typedal,
+        )
+
+    return write_sql_output(
+        io.StringIO(f"-- {migration_name}\n"),
+        output_file,
+        output_format=output_format,
+        is_typedal=is_typedal,
+        default_migration_name=migration_name,
+    )
+
+
+def file_history(filename: str, since: Optional[str] = None, until: str = "current") -> list[str]:
+    """
+    Every version of `filename` in git, oldest first.
+
+    Args:
+        filename: The (absolute) path of the file.
+        since: Optional first commit (or branch, tag) to include. By default, the whole history is used.
+        until: The last version to include: a commit, 'latest' or 'current' (= latest + the version on disk).
+
+    Raises:
+        ValueError: If `filename` is not in a git repository.
+    """
+    if not find_git_root(filename):
+        raise ValueError(f"{filename} is not in a git repository, use --migrations or --no-verify.")
+
+    repo = find_git_repo(at=filename)
+    relative_file_path = str(Path(filename).resolve()).removeprefix(f"{repo.working_dir}/")
+
+    end = "HEAD" if until in {"current", "latest"} else until
+    revision = f"{since}..{end}" if since else end
+    commits = [commit.hexsha for commit in repo.iter_commits(revision, paths=relative_file_path)]
+    commits.reverse()
+    if since:
+        commits.insert(0, since)
+
+    # all commits are resolved at once and unchanged blobs are only read once;
+    # None means the file was deleted in that commit.
+    versions = [
+        code for code in git_reader(Path(repo.working_dir)).read_versions(filename, commits) if code is not None
+    ]
+
+    if until == "current":
+        versions.append(Path(filename).read_text())
+
+    # drop unchanged versions:
+    return [code for idx, code in enumerate(versions) if not idx or code != versions[idx - 1]]
+
+
+def run_squash(
+    filename: Optional[str] = None,
+    since: Optional[str] = None,
+    migrations: Optional[str | Path] = None,
+    verify: bool = True,
+    tables: Optional[list[str]] = None,
+    db_type: Optional[SUPPORTED_DATABASE_TYPES_WITH_ALIASES] = None,
+    magic: bool = False,
+    verbose: bool = False,
+    function: Optional[str] = None,
+    output_format: Optional[SUPPORTED_OUTPUT_FORMATS] = DEFAULT_OUTPUT_FORMAT,
+    output_file: Optional[str | Path] = None,
+    transaction: bool = False,
+) -> bool:
+    """
+    Replace a history of migrations with the CREATE statements for the final version of `filename`.
+
+    The output always comes from `filename`; the history only serves the verification. It is either read from an
+    edwh-migrate file (`migrations`) or generated from the git history of `filename` (from `since`). Unless `verify`
+    is disabled, the history and the squashed migration are both applied to an in-memory SQLite database and the
+    resulting schemas are compared.
+
+    Raises:
+        ValueError: If both `since` and `migrations` are given, or `transaction` with the edwh-migrate format.
+    """
+    check_transaction_format(transaction, output_format)
+    if since and migrations:
+        raise ValueError("--since only applies to the git history and can not be combined with --migrations.")
+
+    functions: set[str] = {function} if function else set()
+    filename = split_function(filename, functions)
+
+    version, file_path = extract_file_version_and_path(filename, default_version="current")
+    git_root = find_git_root(file_path)
+    file_absolute_path = resolve_source(file_path, version, git_root)
+    (code,) = read_sources([(version, file_absolute_path)], git_root, ["table definition"])
+    render = functools.partial(render_sql, db_type=db_type, magic=magic, function_name=tuple(functions))
+
+    squashed = render("", code, tables=tables, verbose=verbose, transaction=transaction)
+    if squashed is None:
+        return False
+
+    if verify:
+        if migrations:
+            history = migrations_from_file(Path(migrations))
+        else:
+            history, previous = [], ""
+            # selected tables may not exist in every version, so render all and only compare the selection
+            for code_version in file_history(file_absolute_path, since, version):
+                if (rendered := render(previous, code_version)) is None:
+                    return False
+                history.append(rendered.getvalue())
+                previous = code_version
+
+        try:
+            differences = verify_squash(history, squashed.getvalue(), flatten(tables or []))
+        except sqlite3.Error as e:
+            raise ValueError(f"Squash could not be verified on SQLite ({e}). Use --no-verify to skip this.") from e
+
+        if differences:
+            rich.print("[red]Squashed migration is not equivalent to the history:[/red]", file=sys.stderr)
+            for difference in differences:
+                rich.print(f"[red] - {difference}[/red]", file=sys.stderr)
+            return False
+
+        rich.print(f"[blue]Verified squash of {len(history)} migration(s).[/blue]", file=sys.stderr)
+
+    return write_sql_output(squashed, output_file, output_format=output_format, is_typedal=detect_typedal(code))
@@ -0,0 +1,268 @@
+"""
+Append-only writing of edwh-migrate migration files, using a sidecar index instead of re-reading the whole file.
+"""
+
+import contextlib
+import hashlib
+import json
+import re
+import textwrap
+import typing
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import rich
+from pydal2sql_core.cli_support import START_RE, sql_to_function_name
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # e.g. Windows, no locking then.
+    fcntl = None  # type: ignore
+
+END_OF_MIGRATION = "-- END OF MIGRATION --"
+
+# every function counts as a taken name, also migrations that were filled in with Python code:
+FUNCTION_NAME_RE = re.compile(r"^def (\w+)\(", re.MULTILINE)
+
+# only migrations that (still) consist of raw SQL have contents to compare:
+EXISTING_MIGRATION_RE = re.compile(
+    r'^def (\w+)\(db[^)]*\):\s*db\.executesql\("""(.*?)"""\)',
+    re.MULTILINE | re.DOTALL,
+)
+
+
+def contents_hash(contents: str) -> str:
+    """
+    Hash SQL contents, ignoring all whitespace (like the comparison in pydal2sql-core).
+    """
+    normalized = contents.replace(" ", "").replace("\n", "")
+    return hashlib.sha1(normalized.encode(), usedforsecurity=False).hexdigest()
+
+
+def index_path_for(output: Path) -> Path:
+    """
+    Sidecar index file for an edwh-migrate output file: `migrations.py` -> `.migrations.py.pydal2sql-index`.
+    """
+    return output.with_name(f".{output.name}.pydal2sql-index")
+
+
+class MigrationIndex:
+    """
+    Names and content hashes of the migrations in an edwh-migrate file.
+
+    The index is a json-lines file next to the migrations file. Every line holds one migration and the size and
+    mtime of the migrations file after that migration was written. If the last line does not match the current
+    state of the migrations file (e.g. it was edited by hand), the index is rebuilt by reading the file once.
+    """
+
+    names: set[str]
+    hashes: set[str]
+
+    def __init__(self, output: Path, index_file: typing.IO[str]) -> None:
+        """
+        Load the index from an already opened (and locked) index file.
+        """
+        self.output = output
+        self._file = index_file
+        self.names = set()
+        self.hashes = set()
+
+        if not self._load():
+            self.rebuild()
+
+    def _signature(self) -> tuple[int, int]:
+        if not self.output.exists():
+            return 0, 0
+
+        stat = self.output.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load(self) -> bool:
+        self._file.seek(0)
+        signature = (0, 0)
+        for line in self._file:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                return False
+
+            if record.get("name"):
+                self.names.add(record["name"])
+            if record.get("hash"):
+                self.hashes.add(record["hash"])
+            signature = record["size"], record["mtime"]
+
+        return signature == self._signature()
+
+    def rebuild(self) -> None:
+        """
+        (Re)create the index from the contents of the migrations file.
+        """
+        self.names = set()
+        self.hashes = set()
+
+        self._file.seek(0)
+        self._file.truncate()
+
+        existing = self.output.read_text() if self.output.exists() else ""
+        hashes = {name: contents_hash(contents) for name, contents in EXISTING_MIGRATION_RE.findall(existing)}
+        for name in FUNCTION_NAME_RE.findall(existing):
+            self.names.add(name)
+            if name in hashes:
+                self.hashes.add(hashes[name])
+                self._write(name=name, hash=hashes[name])
+            else:
+                self._write(name=name)
+
+        self._write()
+
+    def _write(self, **record: str) -> None:
+        size, mtime = self._signature()
+        self._file.write(json.dumps(record | {"size": size, "mtime": mtime}) + "\n")
+        self._file.flush()
+
+    def __contains__(self, name: str) -> bool:
+        """
+        Is there already a migration with this function name?
+        """
+        return name in self.names
+
+    def has_contents(self, contents: str) -> bool:
+        """
+        Is there already a migration with these SQL contents (ignoring whitespace)?
+        """
+        return contents_hash(contents) in self.hashes
+
+    def append(self, name: str, contents: str, migration: str) -> None:
+        """
+        Append a rendered migration to the migrations file and register it in the index.
+        """
+        with self.output.open("a") as f:
+            f.write(migration)
+
+        self.names.add(name)
+        self.hashes.add(contents_hash(contents))
+        self._write(name=name, hash=contents_hash(contents))
+
+
+@contextlib.contextmanager
+def locked_index(output: Path) -> typing.Generator[MigrationIndex, None, None]:
+    """
+    Open the index of `output` with an exclusive lock, so concurrent runs don't write the same migration.
+    """
+    with index_path_for(output).open("a+") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield MigrationIndex(output, f)
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def setup_edwh_migrate(output: Path, is_typedal: bool = False) -> None:
+    """
+    Start a new migrations file with the imports edwh-migrate migrations need (same header as pydal2sql-core).
+    """
+    cls_import = "from typedal import TypeDAL" if is_typedal else "from pydal import DAL"
+    output.write_text(f"from edwh_migrate import migration\n{cls_import}\n")
+
+    rich.print(f"[green] New migrate file {output} created [/green]")
+
+
+def render_migration(func_name: str, contents: str, cls: str) -> str:
+    """
+    Render one edwh-migrate migration function.
+    """
+    contents = textwrap.indent(contents.strip(), " " * 8)
+
+    return f'''
+
+@migration
+def {func_name}(db: {cls}):
+    db.executesql("""
+{contents}
+    """)
+    db.commit()
+
+    return True
+'''
+
+
+def find_migration_name(
+    contents: str,
+    index: MigrationIndex,
+    date: str,
+    default_migration_name: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Find the first free `<action>_<table>_<date>_<number>` name for a migration.
+
+    Returns:
+        The function name, or None if this migration should be skipped (it already exists).
+    """
+    sql_func_name = sql_to_function_name(contents, default=default_migration_name)
+
+    for n in range(1, 1000):
+        func_name = f"{sql_func_name}_{date}_{str(n).zfill(3)}"
+
+        if func_name not in index:
+            # okay function name, stop incrementing
+            return func_name
+        elif index.has_contents(contents):
+            rich.print(f"[yellow] migration {func_name} already exists, skipping! [/yellow]")
+            return None
+        elif func_name.startswith(("alter", default_migration_name or "unknown")):
+            # bump number because alter migrations are different
+            continue
+        else:
+            rich.print(
+                f"[red] migration {func_name} already exists [bold]with different contents[/bold], skipping! [/red]",
+            )
+            return None
+
+    return None  # pragma: no cover
+
+
+def write_edwh_migrations(
+    contents: str,
+    output: Path,
+    is_typedal: bool = False,
+    default_migration_name: Optional[str] = None,
+) -> bool:
+    """
+    Append the migrations in `contents` (separated by END OF MIGRATION) to an edwh-migrate file.
+
+    Names and contents of existing migrations are checked against the sidecar index
+    instead of reading the (possibly huge) output file.
+    """
+    cls = "TypeDAL" if is_typedal else "DAL"
+    date = datetime.now().strftime("%Y%m%d")  # yyyymmdd
+
+    written = 0
+    with locked_index(output) as index:
+        if not output.exists() or output.stat().st_size == 0:
+            setup_edwh_migrate(output, is_typedal)
+            index.rebuild()
+
+        for migration in contents.split(END_OF_MIGRATION):
+            migration = START_RE.sub("", migration)
+            if not migration.strip():
+                continue
+
+            if not (func_name := find_migration_name(migration, index, date, default_migration_name)):
+                continue
+
+            index.append(func_name, migration, render_migration(func_name, migration, cls))
+            written += 1
+
+    if written:
+        rich.print(f"[green] Written migration(s) to {output} [/green]")
+    else:
+        rich.print(f"[yellow] Nothing to write to {output} [/yellow]")
+
+    return True
@@ -0,0 +1,103 @@
+"""
+Read file versions from git via a persistent `git cat-file --batch` process, instead of separate git calls per version.
+"""
+
+import atexit
+import functools
+import subprocess  # nosec: B404
+import typing
+from pathlib import Path
+from typing import Optional
+
+# write specs in chunks that fit in the stdin pipe, so writing never blocks while git waits for us to read its output
+CHUNK_SIZE = 100
+
+
+class GitReader:
+    """
+    Reads file versions from one repository through a persistent `git cat-file --batch` process.
+
+    Any number of `<ref>:<path>` specs are sent in one go, instead of starting git (or walking trees) per version.
+    Contents are memoized by blob sha, so versions where the file did not change are only decoded once.
+    """
+
+    def __init__(self, root: Path) -> None:
+        """
+        Start the cat-file process for the repository at `root`.
+        """
+        self.root = root.resolve()
+        self._blobs: dict[bytes, str] = {}
+        self._process = subprocess.Popen(  # nosec: B603 B607
+            ["git", "cat-file", "--batch"],
+            cwd=self.root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def close(self) -> None:
+        """
+        Stop the cat-file process.
+        """
+        if self._process.poll() is None:
+            typing.cast(typing.IO[bytes], self._process.stdin).close()
+            self._process.wait()
+
+    def relative_path(self, filename: str | Path) -> str:
+        """
+        Path of `filename` relative to the repository root, as used in `<ref>:<path>`.
+        """
+        return Path(filename).resolve().relative_to(self.root).as_posix()
+
+    def _read_object(self, stdout: typing.IO[bytes]) -> Optional[str]:
+        # '<sha> <type> <size>' followed by the contents, or '<spec> missing' (or 'ambiguous')
+        header = stdout.readline().rstrip(b"\n")
+        if header.endswith((b" missing", b" ambiguous")):
+            return None
+
+        sha, kind, size = header.split(b" ")
+        data = stdout.read(int(size))
+        stdout.read(1)  # trailing newline
+        if kind != b"blob":
+            # e.g. `<ref>:<directory>`
+            return None
+
+        if sha not in self._blobs:
+            self._blobs[sha] = data.decode()
+        return self._blobs[sha]
+
+    def read_files(self, versions: typing.Iterable[tuple[str | Path, str]]) -> list[Optional[str]]:
+        """
+        Read multiple (filename, ref) pairs, where ref is a commit, branch, tag or 'latest'.
+
+        Returns:
+            The contents per pair, or None where the ref or the file at that ref does not exist.
+        """
+        stdin = typing.cast(typing.IO[bytes], self._process.stdin)
+        stdout = typing.cast(typing.IO[bytes], self._process.stdout)
+
+        specs = [f"{'HEAD' if ref == 'latest' else ref}:{self.relative_path(filename)}" for filename, ref in versions]
+        contents: list[Optional[str]] = []
+        for start in range(0, len(specs), CHUNK_SIZE):
+            chunk = specs[start : start + CHUNK_SIZE]
+            stdin.write(b"".join(f"{spec}\n".encode() for spec in chunk))
+            stdin.flush()
+            contents.extend(self._read_object(stdout) for _ in chunk)
+
+        return contents
+
+    def read_versions(self, filename: str | Path, refs: typing.Iterable[str]) -> list[Optional[str]]:
+        """
+        Read `filename` at multiple refs, see `read_files`.
+        """
+        return self.read_files((filename, ref) for ref in refs)
+
+
+@functools.cache
+def git_reader(root: Path) -> GitReader:
+    """
+    Get the GitReader of a repository; the process is reused for the rest of this run.
+    """
+    reader = GitReader(root)
+    atexit.register(reader.close)
+    return reader
@@ -0,0 +1,219 @@
+"""
+Dependency-aware slicing of model code, so only the statements needed for the selected tables are executed.
+"""
+
+import ast
+import copy
+import re
+import typing
+from dataclasses import dataclass, field
+
+# names the generated exec template reads back from the executed code, so they are always kept:
+TEMPLATE_NAMES = frozenset({"db_type"})
+
+REFERENCE_RE = re.compile(r"^(?:list:|big-)?reference\s+(\w+)")
+
+# possible class names in string annotations, e.g. `owner: "Owner"` or `pets: "list[Pet]"`
+CLASS_NAME_RE = re.compile(r"\b[A-Z]\w*")
+
+
+class DynamicTableError(Exception):
+    """
+    Raised when a table name can not be determined statically, in which case the code should not be sliced.
+    """
+
+
+def to_snake(camel: str) -> str:
+    """
+    Convert a TypedAL class name to its table name (same logic as typedal.helpers.to_snake).
+    """
+    return "".join([f"_{c.lower()}" if c.isupper() else c for c in camel]).lstrip("_")
+
+
+def _defined_tables(node: ast.AST) -> set[str]:
+    """
+    Find the tables defined via `db.define_table('name')`, `db.define(Class)` or `@db.define` within a node.
+
+    The receiver is not checked by name, so aliases (e.g. `my_db = db`) and attributes (`self.db`) also work.
+    """
+    tables = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Call) and isinstance(child.func, ast.Attribute):
+            method = child.func.attr
+            if method == "define_table":
+                first = child.args[0] if child.args else None
+                if not (isinstance(first, ast.Constant) and isinstance(first.value, str)):
+                    raise DynamicTableError(ast.unparse(child.func))
+                tables.add(first.value)
+            elif method == "define" and child.args:
+                # without args, it's a `@db.define()` decorator (handled via ClassDef below)
+                first = child.args[0]
+                if not isinstance(first, ast.Name):
+                    raise DynamicTableError(ast.unparse(child.func))
+                tables.add(to_snake(first.id))
+        elif isinstance(child, ast.ClassDef):
+            for decorator in child.decorator_list:
+                target = decorator.func if isinstance(decorator, ast.Call) else decorator
+                if isinstance(target, ast.Attribute) and target.attr == "define":
+                    tables.add(to_snake(child.name))
+
+    return tables
+
+
+def _referenced_tables(node: ast.AST, known_tables: typing.Collection[str]) -> set[str]:
+    """
+    Find tables used via `'reference other'` field types, `db.other`, `db['other']` or a TypedAL class within a node.
+
+    TypedAL classes also count when they are only named in a string (forward reference).
+
+    Any attribute or key with the name of a known table counts, whatever the receiver is called.
+    This may keep a few statements too many, but never drops a reference via an alias of `db`.
+    """
+    tables = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Constant) and isinstance(child.value, str):
+            if match := REFERENCE_RE.match(child.value):
+                tables.add(match.group(1))
+            # TypedAL forward references, e.g. `owner: "Owner"` or `list["Owner"]`:
+            tables |= {to_snake(name) for name in CLASS_NAME_RE.findall(child.value)} & set(known_tables)
+        elif isinstance(child, ast.Attribute) and child.attr in known_tables:
+            tables.add(child.attr)
+        elif isinstance(child, ast.Name) and child.id[:1].isupper() and isinstance(child.ctx, ast.Load):
+            # e.g. `owner: Owner` in a TypedTable class
+            if (table := to_snake(child.id)) in known_tables:
+                tables.add(table)
+        elif isinstance(child, ast.Subscript):
+            key = child.slice
+            if isinstance(key, ast.Constant) and key.value in known_tables:
+                tables.add(key.value)
+
+    return tables
+
+
+def _bound_names(node: ast.stmt) -> set[str]:
+    """
+    Names a statement binds in its scope (assignments, imports, defs, loop targets etc.).
+    """
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return {node.name}
+
+    names = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name) and isinstance(child.ctx, (ast.Store, ast.Del)):
+            names.add(child.id)
+        elif isinstance(child, (ast.Import, ast.ImportFrom)):
+            for alias in child.names:
+                if alias.name != "*":
+                    names.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(child.name)
+
+    return names
+
+
+def _used_names(node: ast.AST) -> set[str]:
+    return {child.id for child in ast.walk(node) if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load)}
+
+
+@dataclass
+class _Statement:
+    node: ast.stmt
+    binds: set[str]
+    uses: set[str]
+    defines: set[str]
+    references: set[str]
+    keep: bool = False
+
+
+@dataclass
+class _Slicer:
+    known_tables: set[str]
+    needed_tables: set[str]
+    changed: bool = field(default=False)
+
+    def analyze(self, node: ast.stmt) -> _Statement:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and _defined_tables(node):
+            # tables are defined inside a function, slice its body too:
+            node = copy.copy(node)
+            node.body = self.slice(node.body, set()) or [ast.Pass()]
+
+        return _Statement(
+            node=node,
+            binds=_bound_names(node),
+            uses=_used_names(node),
+            defines=_defined_tables(node),
+            references=_referenced_tables(node, self.known_tables),
+        )
+
+    def wanted(self, statement: _Statement, needed_names: set[str]) -> bool:
+        if statement.defines & self.needed_tables or statement.binds & needed_names:
+            return True
+        if statement.defines:
+            # only defines other tables
+            return False
+        if statement.references:
+            # e.g. db.other.field.requires = ...
+            return bool(statement.references & self.needed_tables)
+
+        # something without bindings (e.g. `db._common_fields.append(...)`) could have side effects, keep it.
+        return not statement.binds
+
+    def slice(self, body: list[ast.stmt], needed_names: set[str]) -> list[ast.stmt]:
+        statements = [self.analyze(node) for node in body]
+
+        changed = True
+        while changed:
+            changed = False
+            for statement in statements:
+                if statement.keep or not self.wanted(statement, needed_names):
+                    continue
+
+                statement.keep = changed = True
+                needed_names |= statement.uses
+                if new_tables := statement.references - self.needed_tables:
+                    self.needed_tables |= new_tables
+                    self.changed = True
+
+        return [statement.node for statement in statements if statement.keep]
+
+
+def slice_code(code: str, tables: typing.Iterable[str], functions: typing.Iterable[str] = ()) -> str:
+    """
+    Remove all statements from `code` that are not required to define `tables`.
+
+    The selected tables, the tables they reference and every assignment, import or function they depend on are kept.
+    Statements without any bindings (which could have side effects on the database object) are also kept,
+    unless they only touch tables that were not selected.
+
+    Args:
+        code: Source code containing the table definitions.
+        tables: The table names to keep. If empty, the code is returned unchanged.
+        functions: Names that must be kept anyway, e.g. a `--function` that will be called.
+
+    Returns:
+        The sliced source code, or the original code if it can not be sliced safely
+        (syntax error, dynamic table names or not every table could be found).
+    """
+    tables = set(tables)
+    if not (tables and code.strip()):
+        return code
+
+    try:
+        tree = ast.parse(code)
+        known_tables = _defined_tables(tree)
+    except (SyntaxError, DynamicTableError):
+        return code
+
+    if not tables <= known_tables:
+        # a selected table is not defined statically (e.g. via a helper), slicing could drop it
+        return code
+
+    slicer = _Slicer(known_tables=known_tables, needed_tables=tables)
+    slicer.changed = True
+    body = tree.body
+    while slicer.changed:
+        # referenced tables found in nested scopes may require another pass
+        slicer.changed = False
+        body = slicer.slice(tree.body, set(functions) | TEMPLATE_NAMES)
+
+    return ast.unparse(ast.Module(body=body, type_ignores=[]))
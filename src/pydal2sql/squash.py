@@ -0,0 +1,131 @@
+"""
+Helpers to squash a history of migrations into CREATE statements, and to verify both are equivalent.
+"""
+
+import sqlite3
+import typing
+from pathlib import Path
+from typing import Optional
+
+import rich
+
+from .edwh_migrate import EXISTING_MIGRATION_RE, FUNCTION_NAME_RE
+
+# table name -> column name -> (declared type, not null, primary key, foreign key)
+# defaults, unique constraints and indexes are not compared.
+Catalog = dict[str, dict[str, tuple[str, bool, bool, Optional[str]]]]
+
+
+def migrations_from_file(path: Path) -> list[str]:
+    """
+    Extract the SQL of every migration in an edwh-migrate file, in order.
+
+    Migrations that are not (only) raw SQL, e.g. stubs filled in with Python code, can't be applied to SQLite.
+    They are left out with a warning: a schema change made that way shows up as a difference in the verification.
+    """
+    text = path.read_text()
+    sql = dict(EXISTING_MIGRATION_RE.findall(text))
+
+    migrations = []
+    for name in FUNCTION_NAME_RE.findall(text):
+        if name in sql:
+            migrations.append(sql[name])
+        else:
+            rich.print(f"[yellow] migration {name} is not plain SQL, it is left out of the verification [/yellow]")
+
+    return migrations
+
+
+def sqlite_catalog(scripts: typing.Iterable[str]) -> Catalog:
+    """
+    Apply SQL scripts to an empty in-memory SQLite database and return the resulting tables and columns.
+
+    Raises:
+        sqlite3.Error: when one of the scripts could not be executed.
+    """
+    connection = sqlite3.connect(":memory:")
+    try:
+        for script in scripts:
+            connection.executescript(script)
+
+        tables = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name;"
+        ).fetchall()
+
+        return {table: _table_catalog(connection, table) for (table,) in tables}
+    finally:
+        connection.close()
+
+
+def _table_catalog(connection: sqlite3.Connection, table: str) -> dict[str, tuple[str, bool, bool, Optional[str]]]:
+    # table name comes from sqlite_master
+    foreign_keys = {
+        column: f"{other_table}.{other_column or 'id'} ON DELETE {on_delete}"
+        for _, _, other_table, column, other_column, _, on_delete, _ in connection.execute(
+            f'PRAGMA foreign_key_list("{table}");'
+        )
+    }
+
+    return {
+        column: (column_type.upper(), bool(notnull), bool(pk), foreign_keys.get(column))
+        for _, column, column_type, notnull, _default, pk in connection.execute(f'PRAGMA table_info("{table}");')
+    }
+
+
+def compare_catalogs(expected: Catalog, actual: Catalog) -> list[str]:
+    """
+    Describe the differences between two catalogs (column order is ignored).
+
+    Column types, NOT NULL, primary and foreign keys are compared; defaults, unique constraints and indexes are not.
+
+    Returns:
+        A list of human-readable differences; empty if both catalogs are equivalent.
+    """
+    differences = []
+    for table in sorted(expected.keys() | actual.keys()):
+        if table not in actual:
+            differences.append(f"table {table} is missing")
+            continue
+        elif table not in expected:
+            differences.append(f"table {table} should not exist")
+            continue
+
+        for column in sorted(expected[table].keys() | actual[table].keys()):
+            before, after = expected[table].get(column), actual[table].get(column)
+            if before == after:
+                continue
+            elif after is None:
+                differences.append(f"column {table}.{column} is missing")
+            elif before is None:
+                differences.append(f"column {table}.{column} should not exist")
+            else:
+                differences.append(f"column {table}.{column} differs: {before} != {after}")
+
+    return differences
+
+
+def verify_squash(
+    history: typing.Iterable[str],
+    squashed: str,
+    tables: Optional[typing.Collection[str]] = None,
+) -> list[str]:
+    """
+    Apply the full history and the squashed migration to in-memory SQLite databases and compare the results.
+
+    Args:
+        history: SQL of every migration, in order.
+        squashed: SQL of the squashed migration.
+        tables: Only compare these tables (default: all).
+
+    Returns:
+        Differences between the two schemas (see `compare_catalogs`).
+
+    Raises:
+        sqlite3.Error: when the SQL could not be applied to SQLite (e.g. MySQL-specific syntax).
+    """
+    expected, actual = sqlite_catalog(history), sqlite_catalog([squashed])
+    if tables:
+        expected = {table: columns for table, columns in expected.items() if table in tables}
+        actual = {table: columns for table, columns in actual.items() if table in tables}
+
+    return compare_catalogs(expected, actual)
@@ -0,0 +1,104 @@
+"""
+Batch generated migrations into a single transaction (or as few statements as possible, for MySQL).
+"""
+
+import re
+import typing
+from typing import Optional
+
+from pydal2sql_core.cli_support import RenderContext, Renderer
+
+MYSQL_DIALECTS = frozenset({"pymysql", "mysql"})
+
+ALTER_RE = re.compile(r"^ALTER\s+TABLE\s+([`\"]?)(\w+)\1\s+(.*)$", re.IGNORECASE | re.DOTALL)
+CLAUSE_COLUMN_RE = re.compile(r"^(?:ADD|DROP|MODIFY|CHANGE)\s+(?:COLUMN\s+)?[`\"]?(\w+)", re.IGNORECASE)
+
+
+def split_statements(sql: str) -> list[str]:
+    """
+    Split SQL into separate statements (without trailing `;`), ignoring `--` comment lines and `;` inside quotes.
+    """
+    sql = "\n".join(line for line in sql.split("\n") if not line.strip().startswith("--"))
+
+    statements = []
+    current: list[str] = []
+    quote: Optional[str] = None
+    for char in sql:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == ";":
+            statements.append("".join(current).strip())
+            current = []
+            continue
+
+        current.append(char)
+
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+def merge_alters(statements: typing.Iterable[str]) -> list[str]:
+    """
+    Merge consecutive `ALTER TABLE` statements on the same table into one `ALTER TABLE t ..., ...`.
+
+    Only consecutive statements are merged, so the order relative to e.g. `UPDATE` statements is kept.
+    A clause that touches a column that was already changed in the current statement starts a new statement.
+    """
+    merged: list[str] = []
+    table: Optional[str] = None
+    columns: set[str] = set()
+
+    for statement in statements:
+        match = ALTER_RE.match(statement)
+        if not match:
+            merged.append(statement)
+            table = None
+            continue
+
+        _, alter_table, clauses = match.groups()
+        column = clause.group(1) if (clause := CLAUSE_COLUMN_RE.match(clauses)) else None
+
+        if table == alter_table and column not in columns:
+            merged[-1] = f"{merged[-1]},\n    {clauses.strip()}"
+        else:
+            merged.append(statement)
+            columns = set()
+
+        table = alter_table
+        if column:
+            columns.add(column)
+
+    return merged
+
+
+def batch_sql(sql: str, db_type: Optional[str]) -> str:
+    """
+    Turn the SQL for multiple tables into one batch that can be applied in a single execute.
+
+    For dialects with transactional DDL (postgres, sqlite), all statements are wrapped in one transaction.
+    MySQL commits after every DDL statement, so there consecutive ALTERs on the same table are merged instead,
+    which also prevents rebuilding a table multiple times.
+    """
+    statements = split_statements(sql)
+    if not statements:
+        return ""
+
+    is_mysql = (db_type or "").lower() in MYSQL_DIALECTS
+    body = merge_alters(statements) if is_mysql else ["BEGIN", *statements, "COMMIT"]
+
+    # neutral marker: for MySQL, this batch is not a transaction
+    return "-- start batch --\n" + "\n".join(f"{statement};" for statement in body) + "\n"
+
+
+def transaction_renderer(renderer: Renderer) -> Renderer:
+    """
+    Wrap a SQL renderer (e.g. default_sql_renderer) so its output is batched with `batch_sql`.
+    """
+
+    def render(context: RenderContext) -> str:
+        return batch_sql(renderer(context), context.db_type)
+
+    return render
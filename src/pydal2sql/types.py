@@ -31,3 +31,11 @@ OutputFormat_Option = Annotated[
     Optional[str],
     Option("--format", "--fmt", help=f"One of {get_typing_args(SUPPORTED_OUTPUT_FORMATS)}"),
 ]
+
+Transaction_Option = Annotated[
+    bool,
+    Option(
+        "--transaction",
+        help="Output one batch: a single transaction for psql/sqlite, merged ALTER TABLE statements for mysql.",
+    ),
+]
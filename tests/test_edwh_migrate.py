@@ -0,0 +1,106 @@
+from typer.testing import CliRunner
+
+from src.pydal2sql.cli import app
+from src.pydal2sql.cli_support import handle_cli
+from src.pydal2sql.edwh_migrate import index_path_for, locked_index, write_edwh_migrations
+
+runner = CliRunner()
+
+CREATE = "-- start thing --\nCREATE TABLE thing(id INTEGER);\n-- END OF MIGRATION --\n"
+
+
+def test_write_edwh_migrations(tmp_path):
+    output = tmp_path / "migrations.py"
+
+    assert write_edwh_migrations(CREATE, output)
+    assert write_edwh_migrations(CREATE, output)  # same contents, skipped
+
+    text = output.read_text()
+    assert text.startswith("from edwh_migrate import migration")
+    assert text.count("@migration") == 1
+    assert "def create_thing_" in text
+    assert index_path_for(output).exists()
+
+    with locked_index(output) as index:
+        assert len(index.names) == 1
+        assert index.has_contents("CREATE TABLE thing(id INTEGER);")
+
+
+def test_stale_index(tmp_path):
+    output = tmp_path / "migrations.py"
+    write_edwh_migrations(CREATE, output)
+
+    # edited by hand, so the index should be rebuilt from the file:
+    with output.open("a") as f:
+        f.write('\n\n@migration\ndef manual_001(db: DAL):\n    db.executesql("""\n        SELECT 1;\n    """)\n')
+
+    with locked_index(output) as index:
+        assert "manual_001" in index
+        assert len(index.names) == 2
+
+    index_path_for(output).write_text("garbage")
+    with locked_index(output) as index:
+        assert len(index.names) == 2
+
+
+def test_cli_stub_numbering(tmp_path):
+    output = tmp_path / "migrations.py"
+
+    for _ in range(2):
+        result = runner.invoke(app, ["stub", "my_stub", "--format", "edwh-migrate", "--output-file", str(output)])
+        assert result.exit_code == 0
+
+    assert output.read_text().count("def my_stub_") == 1  # same stub twice is skipped
+
+    write_edwh_migrations("ALTER TABLE thing ADD one INTEGER;", output)
+    write_edwh_migrations("ALTER TABLE thing ADD two INTEGER;", output)
+
+    text = output.read_text()
+    assert "_001(db: DAL)" in text
+    assert "_002(db: DAL)" in text
+
+
+def test_cli_stub_filled_in(tmp_path):
+    output = tmp_path / "migrations.py"
+    args = ["stub", "my_stub", "--format", "edwh-migrate", "--output-file", str(output)]
+
+    assert runner.invoke(app, args).exit_code == 0
+
+    # the stub is filled in with Python code instead of SQL, so its name is still taken:
+    text = output.read_text()
+    start = text.index('db.executesql("""')
+    end = text.index('""")', start) + len('""")')
+    output.write_text(text[:start] + "db(db.person).update(name='')" + text[end:])
+
+    assert runner.invoke(app, args).exit_code == 0
+
+    text = output.read_text()
+    assert text.count("def my_stub_") == 2
+    assert "_001(db: DAL)" in text
+    assert "_002(db: DAL)" in text
+
+
+def test_different_contents(tmp_path):
+    output = tmp_path / "migrations.py"
+    write_edwh_migrations(CREATE, output)
+    write_edwh_migrations("CREATE TABLE thing(id INTEGER, other TEXT);", output)  # same name, skipped
+
+    assert output.read_text().count("@migration") == 1
+
+    # blank lines in the index are ignored:
+    with index_path_for(output).open("a") as f:
+        f.write("\n")
+    with locked_index(output) as index:
+        assert len(index.names) == 1
+
+
+def test_cli_stub_dry_and_unknown_format(tmp_path):
+    output = tmp_path / "migrations.py"
+
+    result = runner.invoke(app, ["stub", "my_stub", "--dry", "--format", "edwh-migrate", "--output-file", str(output)])
+    assert result.exit_code == 0
+    assert "def my_stub_" in result.stdout
+    assert not output.exists()
+
+    # normally already prevented by the config's type checking:
+    assert not handle_cli("", 'db.define_table("thing")', db_type="sqlite", output_format="unknown")
@@ -0,0 +1,90 @@
+import shutil
+from pathlib import Path
+
+from plumbum import local
+from typer.testing import CliRunner
+
+from src.pydal2sql.cli import app
+from src.pydal2sql.git_reader import GitReader, git_reader
+from tests.mock_git import mock_git
+
+runner = CliRunner()
+
+
+def test_git_reader():
+    with mock_git():
+        git = local["git"]
+        on_disk = Path("magic.py").read_text()  # magic_post
+        git("stash")  # back to magic_pre
+        committed = Path("magic.py").read_text()
+        git("stash", "pop")
+
+        reader = git_reader(Path.cwd())
+        assert git_reader(Path.cwd()) is reader  # one reader per repository
+
+        assert reader.read_versions("magic.py", ["latest", "HEAD"]) == [committed, committed]
+        assert on_disk != committed
+
+        assert reader.read_files([("magic.py", "does-not-exist"), ("missing.py", "latest")]) == [None, None]
+
+        # unchanged versions share one blob, which is only read once:
+        git("commit", "--allow-empty", "-m", "empty")
+        assert reader.read_versions("magic.py", ["HEAD", "HEAD~1", "latest", "nope"]) == [committed] * 3 + [None]
+        assert len(reader._blobs) == 1
+
+        # a directory is not a file:
+        Path("sub").mkdir()
+        shutil.copy("magic.py", "sub/magic.py")
+        git("add", "sub")
+        git("commit", "-m", "sub")
+        assert reader.read_files([("sub", "HEAD"), ("sub/magic.py", "HEAD")]) == [None, on_disk]
+
+
+def test_git_reader_close():
+    with mock_git():
+        reader = GitReader(Path.cwd())
+        shutil.copy("magic.py", "file with spaces.py")
+        local["git"]("add", "file with spaces.py")
+        local["git"]("commit", "-m", "spaces")
+
+        assert reader.read_versions("file with spaces.py", ["latest"]) != [None]
+
+        reader.close()
+        reader.close()  # already stopped, no-op
+
+
+def test_cli_reads_through_git_reader(monkeypatch):
+    def no_gitpython(*_, **__):
+        raise AssertionError("should be read via GitReader")
+
+    monkeypatch.setattr("pydal2sql_core.cli_support.get_file_for_commit", no_gitpython)
+
+    calls = []
+    read_files = GitReader.read_files
+
+    def spy(self, versions):
+        versions = list(versions)
+        calls.append(versions)
+        return read_files(self, versions)
+
+    monkeypatch.setattr(GitReader, "read_files", spy)
+
+    with mock_git():
+        local["git"]("commit", "-am", "post")
+
+        result = runner.invoke(app, ["create", "magic.py@latest", "--magic", "-d", "sqlite", "-t", "empty"])
+        assert result.exit_code == 0, result.stderr
+        assert len(calls) == 1
+
+        # both refs of alter are resolved in one call:
+        result = runner.invoke(app, ["alter", "magic.py@HEAD~1", "magic.py@latest", "--magic", "-d", "sqlite"])
+        assert result.exit_code == 0, result.stderr
+        assert [ref for _, ref in calls[-1]] == ["HEAD~1", "latest"]
+
+        result = runner.invoke(app, ["create", "magic.py@does-not-exist", "--magic"])
+        assert result.exit_code == 1
+        assert "does-not-exist" in result.stderr
+
+        result = runner.invoke(app, ["squash"])
+        assert result.exit_code == 1
+        assert "could not be found" in result.stderr
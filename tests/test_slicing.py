@@ -0,0 +1,220 @@
+import textwrap
+
+from typer.testing import CliRunner
+
+from src.pydal2sql.cli import app
+from src.pydal2sql.slicing import slice_code, to_snake
+
+runner = CliRunner()
+
+MODELS = textwrap.dedent(
+    """
+    import os
+    import json
+
+    from pydal import Field
+
+    UNUSED = json.dumps({})
+    DEFAULT_NAME = os.getenv("NAME", "")
+
+    db.define_table("group", Field("name"))
+    db.define_table("user", Field("name", default=DEFAULT_NAME), Field("group", "reference group"))
+    db.define_table("unrelated", Field("data", default=UNUSED))
+
+    db.unrelated.data.requires = IS_NOT_EMPTY()
+    db.user.name.requires = IS_NOT_EMPTY()
+
+    db_type = "sqlite"
+    """
+)
+
+
+def test_slice_code():
+    sliced = slice_code(MODELS, ["user"])
+
+    assert "define_table('user'" in sliced
+    assert "define_table('group'" in sliced  # referenced
+    assert "DEFAULT_NAME" in sliced
+    assert "import os" in sliced
+    assert "db.user.name.requires" in sliced
+    assert "db_type = 'sqlite'" in sliced  # read by the exec template
+
+    assert "unrelated" not in sliced
+    assert "json" not in sliced
+    assert "UNUSED" not in sliced
+
+
+def test_slice_code_unchanged():
+    assert slice_code(MODELS, []) == MODELS
+    assert slice_code(MODELS, ["missing"]) == MODELS
+    assert slice_code("this is not python", ["user"]) == "this is not python"
+
+    dynamic = 'for name in ["a", "b"]:\n    db.define_table(name)\n'
+    assert slice_code(dynamic, ["a"]) == dynamic
+
+
+def test_slice_code_function():
+    code = textwrap.dedent(
+        """
+        from pydal import DAL
+
+        def define_tables(db: DAL):
+            db.define_table("one")
+            db.define_table("two")
+
+        def unrelated():
+            pass
+        """
+    )
+
+    sliced = slice_code(code, ["two"], ["define_tables"])
+    assert "def define_tables" in sliced
+    assert "define_table('two')" in sliced
+    assert "define_table('one')" not in sliced
+    assert "unrelated" not in sliced
+
+
+def test_slice_code_typedal():
+    assert to_snake("SomeTable") == "some_table"
+
+    code = textwrap.dedent(
+        """
+        from typedal import TypeDAL, TypedTable
+
+        class Owner(TypedTable):
+            name: str
+
+        @db.define
+        class Pet(TypedTable):
+            owner: Owner
+
+        db.define(Owner)
+
+        @db.define()
+        class SomeTable(TypedTable):
+            name: str
+        """
+    )
+
+    sliced = slice_code(code, ["pet"])
+    assert "class Pet" in sliced
+    assert "class Owner" in sliced
+    assert "db.define(Owner)" in sliced  # referenced via the annotation
+    assert "SomeTable" not in sliced
+
+    sliced = slice_code(code, ["some_table"])
+    assert "class SomeTable" in sliced
+    assert "Pet" not in sliced
+
+
+def test_cli_create_sliced(tmp_path):
+    models = tmp_path / "models.py"
+    models.write_text(MODELS)
+
+    result = runner.invoke(app, ["create", str(models), "--tables", "user", "--magic"])
+    assert result.exit_code == 0, result.stderr
+    assert "CREATE TABLE" in result.stdout
+    assert "unrelated" not in result.stdout
+
+
+def test_slice_code_edge_cases():
+    code = textwrap.dedent(
+        """
+        db.define_table("one")
+        db.define_table("two")
+        db["two"]._format = "%(id)s"
+
+        if True:
+            def helper():
+                pass
+        """
+    )
+    sliced = slice_code(code, ["one"])
+    assert "_format" not in sliced
+    assert "helper" not in sliced
+
+    dynamic = "db.define(make_class())\n"
+    assert slice_code(dynamic, ["x"]) == dynamic
+
+
+def test_cli_alter_sliced(tmp_path):
+    before = tmp_path / "before.py"
+    before.write_text('def define_tables(db):\n    db.define_table("user")\n    db.define_table("other")\n')
+    after = tmp_path / "after.py"
+    after.write_text(
+        'def define_tables(db):\n    db.define_table("user", Field("name"))\n    db.define_table("other", Field("x"))\n'
+    )
+
+    result = runner.invoke(
+        app, ["alter", f"{before}:define_tables", f"{after}:define_tables", "-t", "user", "-d", "sqlite"]
+    )
+    assert result.exit_code == 0, result.stderr
+    assert 'ALTER TABLE "user"' in result.stdout
+    assert "other" not in result.stdout
+
+
+def test_slice_code_aliases():
+    sliced = slice_code('my_db.define_table("other")\nmy_db.define_table("user", Field("o", my_db.other))', ["user"])
+    assert "define_table('other')" in sliced
+
+    # 'missing' can't be found statically, so nothing may be dropped:
+    code = 'db.define_table("user")\ndb.define_table("unrelated")\n'
+    assert slice_code(code, ["user", "missing"]) == code
+
+
+def test_cli_create_sliced_alias(tmp_path):
+    models = tmp_path / "models.py"
+    models.write_text(
+        textwrap.dedent(
+            """
+            from typedal import TypeDAL, TypedTable
+
+            my_db = db
+
+            @my_db.define
+            class Pet(TypedTable):
+                name: str
+
+            @db.define
+            class Owner(TypedTable):
+                name: str
+            """
+        )
+    )
+
+    result = runner.invoke(app, ["create", str(models), "-t", "pet", "-t", "owner", "-d", "sqlite"])
+    assert result.exit_code == 0, result.stderr
+    assert 'CREATE TABLE "pet"' in result.stdout
+    assert 'CREATE TABLE "owner"' in result.stdout
+
+
+def test_cli_create_sliced_forward_reference(tmp_path):
+    models = tmp_path / "models.py"
+    models.write_text(
+        textwrap.dedent(
+            """
+            from typedal import TypeDAL, TypedTable
+
+            @db.define
+            class Owner(TypedTable):
+                name: str
+
+            @db.define
+            class Pet(TypedTable):
+                owner: "Owner"
+                friends: list["Owner"]
+
+            @db.define
+            class Unrelated(TypedTable):
+                name: str
+            """
+        )
+    )
+
+    sliced = slice_code(models.read_text(), ["pet"])
+    assert "class Owner" in sliced
+    assert "Unrelated" not in sliced
+
+    result = runner.invoke(app, ["create", str(models), "-d", "sqlite", "-t", "pet"])
+    assert result.exit_code == 0, result.stderr
+    assert 'CREATE TABLE "pet"' in result.stdout
@@ -0,0 +1,155 @@
+from pathlib import Path
+
+from plumbum import local
+from typer.testing import CliRunner
+
+from src.pydal2sql.cli import app
+from src.pydal2sql.edwh_migrate import write_edwh_migrations
+from src.pydal2sql.squash import compare_catalogs, migrations_from_file, sqlite_catalog, verify_squash
+from tests.mock_git import mock_git
+
+runner = CliRunner()
+
+HISTORY = [
+    'CREATE TABLE "person"("id" INTEGER PRIMARY KEY, "name" VARCHAR(512));',
+    'ALTER TABLE "person" ADD "age" INTEGER;',
+    'ALTER TABLE "person" DROP COLUMN "name";',
+]
+
+
+def test_sqlite_catalog():
+    assert sqlite_catalog(HISTORY) == {
+        "person": {
+            "id": ("INTEGER", False, True, None),
+            "age": ("INTEGER", False, False, None),
+        }
+    }
+
+
+def test_compare_catalogs():
+    column = ("INT", False, False, None)
+    assert not compare_catalogs({"a": {"x": column}}, {"a": {"x": column}})
+
+    assert compare_catalogs(
+        {"a": {"x": column, "y": column}, "b": {}},
+        {"a": {"x": ("TEXT", False, False, None), "z": column}, "c": {}},
+    ) == [
+        "column a.x differs: ('INT', False, False, None) != ('TEXT', False, False, None)",
+        "column a.y is missing",
+        "column a.z should not exist",
+        "table b is missing",
+        "table c should not exist",
+    ]
+
+
+def test_verify_squash():
+    squashed = 'CREATE TABLE "person"("age" INTEGER, "id" INTEGER PRIMARY KEY);'
+    assert verify_squash(HISTORY, squashed) == []
+    assert verify_squash(HISTORY, squashed + 'CREATE TABLE "other"("id" INTEGER);') == ["table other should not exist"]
+    assert verify_squash(HISTORY, squashed + 'CREATE TABLE "other"("id" INTEGER);', ["person"]) == []
+
+    # a lost REFERENCES is a difference too:
+    pet = 'CREATE TABLE "pet"("id" INTEGER PRIMARY KEY, "owner" INTEGER REFERENCES "person" ("id") ON DELETE CASCADE);'
+    [difference] = verify_squash(
+        [*HISTORY, pet], squashed + 'CREATE TABLE "pet"("id" INTEGER PRIMARY KEY, "owner" INTEGER);'
+    )
+    assert difference.startswith("column pet.owner differs")
+    assert "person.id ON DELETE CASCADE" in difference
+
+
+def test_migrations_from_file(tmp_path, capsys):
+    output = tmp_path / "migrations.py"
+    for sql in HISTORY:
+        write_edwh_migrations(sql, output)
+
+    assert len(migrations_from_file(output)) == 3
+
+    # a migration with Python code instead of SQL can't be applied to SQLite:
+    with output.open("a") as f:
+        f.write("\n\n@migration\ndef fill_ages(db: DAL):\n    db(db.person).update(age=0)\n    return True\n")
+
+    assert len(migrations_from_file(output)) == 3
+    assert "fill_ages is not plain SQL" in capsys.readouterr().out
+
+
+def test_cli_squash_git():
+    with mock_git():
+        result = runner.invoke(app, ["squash", "magic.py", "--magic"])
+        assert result.exit_code == 0, result.stderr
+        assert "Verified squash of 2 migration(s)" in result.stderr
+        assert result.stdout.count("CREATE TABLE") == 3
+
+        result = runner.invoke(app, ["squash", "magic.py@latest", "--magic", "--since", "HEAD", "--tables", "empty"])
+        assert result.exit_code == 0, result.stderr
+        assert result.stdout.count("CREATE TABLE") == 1
+
+        result = runner.invoke(app, ["squash", "missing.py"])
+        assert result.exit_code == 1
+        assert "could not be found" in result.stderr
+
+        Path("broken.py").write_text("0/0")
+        result = runner.invoke(app, ["squash", "broken.py"])
+        assert result.exit_code == 1
+        assert "squash failed" in result.stderr
+
+        # an old version that can't be executed can't be verified:
+        Path("models.py").write_text("0/0")
+        local["git"]("add", "models.py")
+        local["git"]("commit", "-m", "broken")
+        Path("models.py").write_text('db.define_table("fixed")')
+
+        result = runner.invoke(app, ["squash", "models.py", "-t", "fixed", "-d", "sqlite"])
+        assert result.exit_code == 1
+        assert "squash failed" in result.stderr, result.stderr
+
+
+def test_cli_squash_outside_git(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("models.py").write_text('db.define_table("person")\n')
+
+    result = runner.invoke(app, ["squash", "models.py", "-d", "sqlite", "-t", "person"])
+    assert result.exit_code == 1
+    assert "not in a git repository" in " ".join(result.stderr.split())
+
+    result = runner.invoke(app, ["squash", "models.py", "-d", "sqlite", "-t", "person", "--no-verify"])
+    assert result.exit_code == 0, result.stderr
+    assert "CREATE TABLE" in result.stdout
+
+
+def test_cli_squash_migrations(tmp_path):
+    models = tmp_path / "models.py"
+    models.write_text('db.define_table("person", Field("age", "integer"))\n')
+    migrations = tmp_path / "migrations.py"
+    for sql in HISTORY:
+        write_edwh_migrations(sql, migrations)
+
+    args = ["squash", str(models), "--migrations", str(migrations), "--db-type", "sqlite", "-t", "person"]
+
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.stderr
+
+    models.write_text('db.define_table("person", Field("age", "integer"), Field("name"))\n')
+    result = runner.invoke(app, args)
+    assert result.exit_code == 1
+    assert "not equivalent" in result.stderr
+    assert "person.name" in result.stderr
+
+    result = runner.invoke(app, [*args, "--no-verify"])
+    assert result.exit_code == 0
+
+    output = tmp_path / "squashed.py"
+    result = runner.invoke(
+        app, [*args, "--no-verify", "--transaction", "--format", "edwh-migrate", "--output-file", str(output)]
+    )
+    assert result.exit_code == 1
+    assert "edwh-migrate" in result.stderr
+    assert not output.exists()
+
+    result = runner.invoke(app, [*args, "--since", "HEAD"])
+    assert result.exit_code == 1
+    assert "--since" in result.stderr
+
+    write_edwh_migrations("THIS IS NOT SQL;", migrations)
+    result = runner.invoke(app, args)
+    assert result.exit_code == 1
+    assert "--no-verify" in result.stderr
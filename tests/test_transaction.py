@@ -0,0 +1,87 @@
+from typer.testing import CliRunner
+
+from src.pydal2sql.cli import app
+from src.pydal2sql.transaction import batch_sql, merge_alters, split_statements
+
+runner = CliRunner()
+
+SQL = """-- start  person --
+ALTER TABLE "person" ADD "nick" VARCHAR(512) DEFAULT 'a;b';
+ALTER TABLE "person" ADD "email" VARCHAR(512);
+-- END OF MIGRATION --
+-- start  other --
+CREATE TABLE "other"(
+    "id" SERIAL PRIMARY KEY
+);
+-- END OF MIGRATION --
+"""
+
+
+def test_split_statements():
+    assert split_statements(SQL) == [
+        """ALTER TABLE "person" ADD "nick" VARCHAR(512) DEFAULT 'a;b'""",
+        'ALTER TABLE "person" ADD "email" VARCHAR(512)',
+        'CREATE TABLE "other"(\n    "id" SERIAL PRIMARY KEY\n)',
+    ]
+    assert split_statements("-- nothing --\n") == []
+
+
+def test_merge_alters():
+    assert merge_alters(
+        [
+            'ALTER TABLE "t" ADD "a" INT',
+            'ALTER TABLE "t" ADD "b" INT',
+            'UPDATE "t" SET "a"="b"',
+            'ALTER TABLE "t" DROP COLUMN "a"',
+            'ALTER TABLE "t" ADD "a" TEXT',  # same column, can't merge
+            'ALTER TABLE "u" ADD "a" TEXT',
+        ]
+    ) == [
+        'ALTER TABLE "t" ADD "a" INT,\n    ADD "b" INT',
+        'UPDATE "t" SET "a"="b"',
+        'ALTER TABLE "t" DROP COLUMN "a"',
+        'ALTER TABLE "t" ADD "a" TEXT',
+        'ALTER TABLE "u" ADD "a" TEXT',
+    ]
+
+
+def test_batch_sql():
+    psql = batch_sql(SQL, "psql")
+    assert psql.startswith("-- start batch --\nBEGIN;\n")
+    assert psql.endswith("COMMIT;\n")
+    assert psql.count("ALTER TABLE") == 2
+
+    mysql = batch_sql(SQL, "mysql")
+    assert mysql.startswith("-- start batch --\n")
+    assert "BEGIN" not in mysql
+    assert mysql.count("ALTER TABLE") == 1
+
+    assert batch_sql("", "sqlite") == ""
+
+
+def test_cli_transaction(tmp_path):
+    models = tmp_path / "models.py"
+    models.write_text('db.define_table("one")\ndb.define_table("two")\n')
+
+    result = runner.invoke(
+        app, ["create", str(models), "--db-type", "sqlite", "--transaction", "-t", "one", "-t", "two"]
+    )
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout.count("BEGIN;") == 1
+    assert result.stdout.count("CREATE TABLE") == 2
+    assert result.stdout.strip().endswith("COMMIT;")
+
+
+def test_cli_transaction_edwh_migrate(tmp_path):
+    models = tmp_path / "models.py"
+    models.write_text('db.define_table("one")\n')
+    output = tmp_path / "migrations.py"
+
+    result = runner.invoke(
+        app,
+        ["create", str(models), "-d", "psql", "--transaction", "-t", "one", "--format", "edwh-migrate"]
+        + ["--output-file", str(output)],
+    )
+    assert result.exit_code == 1
+    assert "edwh-migrate" in result.stderr
+    assert not output.exists()